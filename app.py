@@ -1,15 +1,90 @@
-from flask import Flask, request, send_file, jsonify
-import subprocess
+from flask import Flask, Response, request, jsonify, stream_with_context
+import asyncio
+import csv
+import io
 import os
+import threading
+import orjson
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.utils import secure_filename
 from flask_cors import CORS
 
+from playwright.async_api import async_playwright
+
+from browser_pool import BrowserPool
+from contact_cache import ContactCache
+from process import FIELDNAMES, SCRAPE_CONCURRENCY, load_urls, scrape as scrape_urls
+from web import HEADER as WEB_HEADER, scrape as scrape_web
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serializes jsonify() responses with orjson instead of the stdlib json module."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app, origins=["https://www.scrapotech.com"])
 
 
-UPLOAD_FOLDER = 'uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Seconds a single-URL request waits for a free browser context before it is
+# turned away with a 503; batch rows always wait their turn
+POOL_ACQUIRE_TIMEOUT = float(os.getenv("POOL_ACQUIRE_TIMEOUT", "60"))
+# Contexts kept created ahead of requests, refilled as they are used
+POOL_WARM_CONTEXTS = int(os.getenv("POOL_WARM_CONTEXTS", "4"))
+
+# === Shared browser ===
+# One event loop thread owns Playwright and the browser pool for the life of the
+# worker process, so requests never pay for starting Chromium
+loop = asyncio.new_event_loop()
+threading.Thread(target=loop.run_forever, name="browser-pool", daemon=True).start()
+
+async def start_pool():
+    playwright = await async_playwright().start()
+    pool = BrowserPool(playwright, size=SCRAPE_CONCURRENCY)
+    return await pool.warm_up(POOL_WARM_CONTEXTS)
+
+def run_on_pool_loop(coro):
+    """Runs a coroutine on the browser pool's loop and blocks for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+browser_pool = run_on_pool_loop(start_pool())
+# Shared by every request so repeat domains skip the browser entirely
+contact_cache = ContactCache()
+
+def iter_async(agen):
+    """Drives an async generator on the browser pool's loop from synchronous code."""
+    # run_coroutine_threadsafe only accepts real coroutines, not the awaitables
+    # returned by __anext__/aclose
+    async def step():
+        return await agen.__anext__()
+
+    async def close():
+        await agen.aclose()
+
+    try:
+        while True:
+            try:
+                yield run_on_pool_loop(step())
+            except StopAsyncIteration:
+                break
+    finally:
+        run_on_pool_loop(close())
+
+def stream_csv(rows):
+    """Yields a CSV header, then one CSV line per row as it arrives."""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=FIELDNAMES)
+    writer.writeheader()
+    for row in rows:
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        writer.writerow(row)
+    yield buf.getvalue()
 
 @app.route('/')
 def index():
@@ -21,28 +96,45 @@ def scrape():
         # Handle scraping from URL
         if 'url' in request.form:
             url = request.form['url']
-            output_file = os.path.join(UPLOAD_FOLDER, f'output_{os.getpid()}.csv')
-            result = subprocess.run(['python', 'web.py', url, output_file], capture_output=True)
+            try:
+                row = run_on_pool_loop(scrape_web(url, browser_pool, POOL_ACQUIRE_TIMEOUT))
+            except asyncio.TimeoutError:
+                return jsonify({'error': 'Scraper busy, try again shortly'}), 503
+            except Exception as e:
+                return jsonify({'error': 'Scraping failed', 'details': str(e)}), 500
 
-            if result.returncode != 0:
-                return jsonify({'error': 'Scraping failed', 'details': result.stderr.decode()}), 500
-
-            return send_file(output_file, as_attachment=True)
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(WEB_HEADER)
+            writer.writerow(row)
+            return Response(
+                buf.getvalue(),
+                mimetype='text/csv',
+                headers={'Content-Disposition': 'attachment; filename=output.csv'},
+            )
 
         # Handle scraping from uploaded file
         elif 'file' in request.files:
             file = request.files['file']
+            # Only used to name the download
             filename = secure_filename(file.filename)
-            input_path = os.path.join(UPLOAD_FOLDER, filename)
-            output_path = os.path.join(UPLOAD_FOLDER, f"{filename}_output.csv")
-
-            file.save(input_path)
-            result = subprocess.run(['python', 'process.py', input_path, output_path], capture_output=True)
 
-            if result.returncode != 0:
-                return jsonify({'error': 'Processing failed', 'details': result.stderr.decode()}), 500
+            # Keep the upload in memory; the reader takes file objects as well as paths
+            upload = io.BytesIO()
+            file.save(upload)
+            try:
+                urls = load_urls(upload)
+            except Exception as e:
+                return jsonify({'error': 'Processing failed', 'details': str(e)}), 500
 
-            return send_file(output_path, as_attachment=True)
+            # Stream rows to the client as each site finishes instead of
+            # holding the whole result set until the batch is done
+            rows = iter_async(scrape_urls(urls, browser_pool, contact_cache))
+            return Response(
+                stream_with_context(stream_csv(rows)),
+                mimetype='text/csv',
+                headers={'Content-Disposition': f'attachment; filename={filename}_output.csv'},
+            )
 
         else:
             return jsonify({'error': 'No URL or file provided'}), 400
@@ -0,0 +1,115 @@
+import asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import BrowserContext, Playwright, Route, async_playwright
+
+# Contact details live in the HTML; these only cost bandwidth and render time
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+LAUNCH_ARGS = ["--disable-features=TranslateUI", "--disable-background-timer-throttling"]
+TIMEOUT_MS = 15000
+
+
+async def _block_heavy_resources(route: Route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class BrowserPool:
+    """Launches Chromium once and hands out a bounded number of browser contexts."""
+
+    def __init__(self, playwright: Playwright, size: int = 8):
+        self.playwright = playwright
+        self.size = size
+        self.browser = None
+        self._slots = asyncio.Semaphore(size)
+        self._launch_lock = asyncio.Lock()
+        self._warm = []
+        self._warm_target = 0
+        self._refilling = 0
+
+    async def start(self):
+        async with self._launch_lock:
+            if self.browser is None or not self.browser.is_connected():
+                # Relaunch if Chromium died under a long-lived pool; any warm
+                # contexts went with it
+                self._warm.clear()
+                self.browser = await self.playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        return self
+
+    async def warm_up(self, count: int):
+        """Launches the browser and keeps up to `count` contexts created ahead of acquires."""
+        self._warm_target = min(count, self.size)
+        await self.start()
+        while len(self._warm) < self._warm_target:
+            self._warm.append(await self._new_context())
+        return self
+
+    async def _new_context(self) -> BrowserContext:
+        context = await self.browser.new_context()
+        context.set_default_timeout(TIMEOUT_MS)
+        await context.route("**/*", _block_heavy_resources)
+        return context
+
+    async def acquire(self, timeout: float = None) -> BrowserContext:
+        # Blocks once `size` contexts are checked out, which bounds concurrency.
+        # Each caller gets a fresh context so cookies and storage never leak
+        # between sites; contexts are cheap next to launching a browser.
+        # Raises asyncio.TimeoutError if no slot frees up within `timeout`.
+        await asyncio.wait_for(self._slots.acquire(), timeout)
+        try:
+            await self.start()
+            if self._warm:
+                return self._warm.pop()
+            return await self._new_context()
+        except Exception:
+            self._slots.release()
+            raise
+
+    async def release(self, context: BrowserContext):
+        try:
+            await context.close()
+        except Exception:
+            pass
+        finally:
+            self._slots.release()
+        await self._refill()
+
+    async def _refill(self):
+        # Replace a used warm context after the slot is free, so the next
+        # acquire skips creating one again
+        if self.browser is None or len(self._warm) + self._refilling >= self._warm_target:
+            return
+        self._refilling += 1
+        try:
+            self._warm.append(await self._new_context())
+        except Exception:
+            pass
+        finally:
+            self._refilling -= 1
+
+    @asynccontextmanager
+    async def context(self, timeout: float = None):
+        context = await self.acquire(timeout)
+        try:
+            yield context
+        finally:
+            await self.release(context)
+
+    async def close(self):
+        self._warm_target = 0
+        self._warm.clear()
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
+
+
+@asynccontextmanager
+async def open_pool(size: int = 8):
+    """Starts Playwright and a BrowserPool for the duration of a single batch."""
+    async with async_playwright() as playwright:
+        pool = await BrowserPool(playwright, size=size).start()
+        try:
+            yield pool
+        finally:
+            await pool.close()
@@ -0,0 +1,71 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+CACHE_PATH = os.getenv("CONTACT_CACHE_PATH", "contact_cache.sqlite3")
+# How long a scraped result is reused; 0 disables reuse
+CACHE_TTL_SECONDS = float(os.getenv("CONTACT_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def canonical_domain(url):
+    """Reduces a URL or bare domain to its lowercase host without a leading "www."."""
+    host = urlparse(url if "://" in url else "https://" + url).hostname or ""
+    return host.removeprefix("www.")
+
+
+class ContactCache:
+    """Domain -> scraped result row, held in a small in-memory LRU backed by SQLite."""
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL_SECONDS, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._recent = OrderedDict()
+        # Callers run get/put in worker threads to keep SQLite off the event
+        # loop, so every method holds this lock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS contacts (domain TEXT PRIMARY KEY, stored_at REAL NOT NULL, row TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, domain):
+        with self._lock:
+            return self._get(domain)
+
+    def _get(self, domain):
+        entry = self._recent.get(domain)
+        if entry is None:
+            found = self._db.execute("SELECT stored_at, row FROM contacts WHERE domain = ?", (domain,)).fetchone()
+            if found is None:
+                return None
+            entry = (found[0], json.loads(found[1]))
+        if time.time() - entry[0] >= self.ttl:
+            self._recent.pop(domain, None)
+            return None
+        self._remember(domain, entry)
+        return dict(entry[1])
+
+    def put(self, domain, row):
+        entry = (time.time(), dict(row))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO contacts (domain, stored_at, row) VALUES (?, ?, ?)",
+                (domain, entry[0], json.dumps(entry[1])),
+            )
+            self._db.commit()
+            self._remember(domain, entry)
+
+    def _remember(self, domain, entry):
+        self._recent[domain] = entry
+        self._recent.move_to_end(domain)
+        if len(self._recent) > self.max_entries:
+            self._recent.popitem(last=False)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
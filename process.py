@@ -1,86 +1,242 @@
 import csv
+import html
+import io
 import re
 import asyncio
+import os
 import sys
-import pandas as pd
-from urllib.parse import urlparse, urljoin
-from playwright.async_api import async_playwright, Browser
+import zipfile
+from contextlib import closing
+try:
+    # Linear-time matching for the patterns that scan whole pages
+    import re2
+except ImportError:
+    import re as re2
+try:
+    # SIMD multi-pattern scanning for the email/phone pass, where available
+    import hyperscan
+except ImportError:
+    hyperscan = None
+import openpyxl
+from urllib.parse import unquote, urlparse, urljoin
+from playwright.async_api import BrowserContext
+from browser_pool import open_pool
+from contact_cache import ContactCache, canonical_domain
+
+# Number of pages scraped at once
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "8"))
+
+class ScrapeError(Exception):
+    """Raised when an input file can't be turned into a list of URLs to scrape."""
+
+FIELDNAMES = ["url", "emails", "phones", "facebook", "instagram", "linkedin"]
 
 # === Patterns ===
-email_pattern = re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
-phone_pattern = re.compile(r"(\+?\d[\d\s().-]{7,}\d)")
-social_patterns = {
-    "facebook": re.compile(r"facebook\.com/[^\s\"'<>]+"),
-    "instagram": re.compile(r"instagram\.com/[^\s\"'<>]+"),
-    "linkedin": re.compile(r"linkedin\.com/[^\s\"'<>]+"),
-}
+EMAIL_REGEX = r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b"
+PHONE_REGEX = r"\+?\d[\d\s().-]{7,}\d"
+email_pattern = re2.compile(EMAIL_REGEX)
+phone_pattern = re2.compile(PHONE_REGEX)
+# One alternation per platform; `lastgroup` on a match names the platform
+_SOCIAL = re2.compile(
+    r"(?P<facebook>facebook\.com/[^\s\"'<>]+)"
+    r"|(?P<instagram>instagram\.com/[^\s\"'<>]+)"
+    r"|(?P<linkedin>linkedin\.com/[^\s\"'<>]+)"
+)
+# YYYY, YYYY-MM or YYYY-MM-DD (either separator)
+_DATE_ANY = re.compile(r"\d{4}(?:[-/]\d{2}(?:[-/]\d{2})?)?")
+_SCRIPT_STYLE = re.compile(r"<(script|style)\b[^>]*>.*?</\1>", re.DOTALL | re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+# Heuristic for spotting the column that holds URLs or emails
+_URL_HINT = re.compile(r"@|\.com|\.net|\.org|\.io|\.co", re.IGNORECASE)
+# Something with a dot, no spaces, and a non-empty part before the first dot
+_URL_LIKE = re.compile(r"[^. ][^ ]*\.[^ ]*")
+# Links likely to lead to a contact page; mailto:contact@... and tel: links
+# contain the same words but can't be navigated to
+CONTACT_LINK_SELECTOR = ", ".join(
+    f"a[href*='{word}' i]:not([href^='mailto:' i]):not([href^='tel:' i])"
+    for word in ("contact", "about", "support")
+)
+# Anchors that can hold a social profile or an email address
+SOCIAL_LINK_SELECTOR = (
+    "a[href*='facebook.com' i], a[href*='instagram.com' i], a[href*='linkedin.com' i], a[href^='mailto:' i]"
+)
+# E.164 caps a full international number at 15 digits
+MAX_PHONE_DIGITS = 15
+class _DigitTable(dict):
+    """str.translate table that deletes every non-digit, at any code point.
+
+    Each code point is looked up once and then cached, so repeat characters
+    are handled in C like a normal str.maketrans table.
+    """
+
+    def __missing__(self, codepoint):
+        self[codepoint] = codepoint if chr(codepoint).isdigit() else None
+        return self[codepoint]
+
+_DIGIT_TABLE = _DigitTable()
+
+def compile_contact_database():
+    """Compiles the email and phone patterns into one Hyperscan prefilter database (ids 0 and 1)."""
+    if hyperscan is None:
+        return None
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[EMAIL_REGEX.encode(), PHONE_REGEX.encode()],
+            ids=[0, 1],
+            # Unicode \s and \d accept everything the regex patterns do, so a
+            # pattern that never fires here cannot match there either
+            flags=hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SINGLEMATCH,
+        )
+        return db
+    except Exception as e:
+        print(f"[WARN] Hyperscan unavailable, using regex scanning: {e}", file=sys.stderr)
+        return None
+
+contact_db = compile_contact_database()
+
+def find_contacts(text):
+    """Returns the sets of emails and raw phone strings found in text."""
+    if contact_db is None:
+        return set(email_pattern.findall(text)), set(phone_pattern.findall(text))
+
+    # Hyperscan only tells which patterns occur at all; the matches themselves
+    # come from the regex patterns so they are exactly what findall returns
+    found = set()
+
+    def on_match(pattern_id, start, end, flags, context):
+        found.add(pattern_id)
+
+    contact_db.scan(text.encode("utf-8", "ignore"), match_event_handler=on_match)
+    emails = set(email_pattern.findall(text)) if 0 in found else set()
+    phones = set(phone_pattern.findall(text)) if 1 in found else set()
+    return emails, phones
 
 def is_date(string):
     string_clean = str(string).replace(" ", "")
     if len(string_clean) > 10:
         return False
-    if re.fullmatch(r"\d{4}[-/]\d{2}[-/]\d{2}", string_clean):
-        return True
-    if re.fullmatch(r"\d{4}[-/]\d{2}", string_clean) or re.fullmatch(r"\d{4}", string_clean):
-        return True
-    return False
+    return _DATE_ANY.fullmatch(string_clean) is not None
 
 def clean_phone(phone):
-    return "".join(filter(str.isdigit, phone))
+    return phone.translate(_DIGIT_TABLE)
+
+def drop_contained(phones):
+    """Returns the phones that aren't part of a longer one, longest first.
+
+    Every substring of each kept number goes into a set, so each check is a
+    single hash lookup rather than a search through everything kept so far.
+    Anything longer than MAX_PHONE_DIGITS is dropped first; such runs (numbered
+    lists, pagination) aren't phone numbers and would make the set huge.
+    """
+    kept = []
+    covered = set()
+    for phone in sorted(phones, key=len, reverse=True):
+        if len(phone) > MAX_PHONE_DIGITS:
+            continue
+        if phone not in covered:
+            kept.append(phone)
+            n = len(phone)
+            covered.update(phone[i:j] for i in range(n) for j in range(i + 1, n + 1))
+    return kept
 
 def is_valid_url(url):
     parsed = urlparse(url)
     return bool(parsed.scheme and parsed.netloc)
 
-async def get_contact_info(browser: Browser, url: str):
+def pick_contact_url(page_url, hrefs):
+    """Returns the first href that resolves to an http(s) page on the same site, or None."""
+    site = canonical_domain(page_url)
+    for href in hrefs:
+        try:
+            candidate = urljoin(page_url, href)
+            if urlparse(candidate).scheme in ("http", "https") and canonical_domain(candidate) == site:
+                return candidate
+        except ValueError:
+            # Malformed href, e.g. an unbalanced "[" in the host
+            continue
+    return None
+
+def mailto_addresses(links):
+    """Yields the decoded target of every mailto: link, e.g. "info@acme.com?subject=Hi"."""
+    for link in links:
+        # Catches MAILTO:, info%40acme.com and &#64;-encoded addresses alike
+        decoded = unquote(html.unescape(link))
+        if decoded[:7].lower() == "mailto:":
+            yield decoded[7:]
+
+def empty_result(url):
+    return {"url": url, "emails": "", "phones": "", "facebook": "", "instagram": "", "linkedin": ""}
+
+async def goto(page, url):
+    # "networkidle" can hang for many seconds on analytics beacons; wait for the
+    # DOM, then briefly for links, which is all the scrape needs
+    await page.goto(url, wait_until="domcontentloaded")
+    try:
+        await page.wait_for_selector("a[href]", state="attached", timeout=2000)
+    except Exception:
+        pass
+
+async def get_contact_info(context: BrowserContext, url: str):
     if not url.startswith("http"):
         url = "https://" + url
 
     if not is_valid_url(url):
         print(f"[INVALID] Skipping malformed URL: {url}", file=sys.stderr)
-        return {"url": url, "emails": "", "phones": "", "facebook": "", "instagram": "", "linkedin": ""}
+        return empty_result(url)
 
     page = None
     try:
-        page = await browser.new_page()
-        # Go to the initial page and wait for all network activity to settle
-        await page.goto(url, timeout=30000, wait_until="networkidle")
+        page = await context.new_page()
+        await goto(page, url)
 
         # --- Try to find and navigate to a contact page ---
         try:
-            # Use a case-insensitive text selector to find a link with 'contact', 'about', or 'support'
-            contact_link_locator = page.locator("a:text-matches('contact|about|support', 'i')").first
-            contact_href = await contact_link_locator.get_attribute('href', timeout=2000)
-            if contact_href:
-                contact_url = urljoin(url, contact_href)
+            # Match 'contact', 'about' or 'support' in the href; unlike a text match
+            # this needs no layout
+            hrefs = await page.locator(CONTACT_LINK_SELECTOR).evaluate_all(
+                "els => els.map(e => e.getAttribute('href'))"
+            )
+            contact_url = pick_contact_url(page.url, hrefs)
+            if contact_url:
                 print(f"[INFO] {url}: Found contact page, navigating to {contact_url}", file=sys.stderr)
-                # Navigate to the contact page and wait for it to settle
-                await page.goto(contact_url, timeout=30000, wait_until="networkidle")
+                await goto(page, contact_url)
+            else:
+                print(f"[DEBUG] {url}: No contact page found. Scraping current page.", file=sys.stderr)
         except Exception:
             print(f"[DEBUG] {url}: No contact page found or failed to navigate. Scraping current page.", file=sys.stderr)
         # --- End of contact page logic ---
 
-        content = await page.content()
+        # Run the patterns over the rendered text only; scripts, styles and markup
+        # are most of the page's bytes and rarely hold contact details
+        text = await page.inner_text("body")
+        if not text.strip():
+            content = await page.content()
+            text = _TAG.sub(" ", _SCRIPT_STYLE.sub("", content))
 
         # Extract emails and phones
-        emails = set(email_pattern.findall(content))
-        phones = set(phone_pattern.findall(content))
+        emails, phones = find_contacts(text)
         print(f"[DEBUG] {url}: Found {len(emails)} emails, {len(phones)} raw phone numbers.", file=sys.stderr)
         cleaned_phones = {clean_phone(p) for p in phones if not is_date(p)}
 
         # Filter unique phone numbers
-        unique_phones = set()
-        for phone in sorted(cleaned_phones, key=len, reverse=True):
-            if not any(phone in p for p in unique_phones):
-                unique_phones.add(phone)
+        unique_phones = drop_contained(cleaned_phones)
 
-        # Extract social media links from <a href>
-        links = await page.eval_on_selector_all("a[href]", "els => els.map(e => e.href)")
+        # Extract social media and mailto links. Only anchors that can match are
+        # sent back, and e.href is already absolute and entity-decoded.
+        links = await page.locator(SOCIAL_LINK_SELECTOR).evaluate_all("els => els.map(e => e.href)")
+        # Addresses behind "Email us" style links never show up in the visible text
+        emails.update(email_pattern.findall(" ".join(mailto_addresses(links))))
         socials = {"facebook": "", "instagram": "", "linkedin": ""}
+        # Stop at the first link for every platform; pages can have hundreds
+        missing = len(socials)
         for link in links:
-            for platform, pattern in social_patterns.items():
-                if pattern.search(link) and socials[platform] == "":
-                    socials[platform] = link
+            m = _SOCIAL.search(link)
+            if m and not socials[m.lastgroup]:
+                socials[m.lastgroup] = link
+                missing -= 1
+                if not missing:
+                    break
 
         return {"url": url, "emails": ", ".join(emails), "phones": ", ".join(unique_phones), **socials}
     except Exception as e:
@@ -98,101 +254,193 @@ async def get_contact_info(browser: Browser, url: str):
                 print(f"  - Saved HTML to {html_path}", file=sys.stderr)
         except Exception as debug_e:
             print(f"  - Failed to save debug files: {debug_e}", file=sys.stderr)
-        return {"url": url, "emails": "", "phones": "", "facebook": "", "instagram": "", "linkedin": ""}
+        return empty_result(url)
     finally:
         if page and not page.is_closed():
             await page.close()
 
-async def main(input_file: str, output_file: str):
-    try:
-        # Use pandas to read either CSV or Excel, robustly
+def read_table(input_file):
+    """Yields the rows of a CSV or .xlsx file as lists of strings, header first.
+
+    `input_file` is a path or a binary file object, such as an upload held in memory.
+    """
+    # .xlsx files are zip archives; anything else is treated as CSV
+    is_xlsx = zipfile.is_zipfile(input_file)
+    if not isinstance(input_file, str):
+        input_file.seek(0)
+
+    if is_xlsx:
+        workbook = openpyxl.load_workbook(input_file, read_only=True, data_only=True)
         try:
-            df = pd.read_csv(input_file, on_bad_lines='skip', encoding='utf-8')
-        except (UnicodeDecodeError, pd.errors.ParserError):
-            df = pd.read_excel(input_file)
+            for row in workbook.active.iter_rows(values_only=True):
+                yield ["" if value is None else str(value) for value in row]
+        finally:
+            workbook.close()
+    else:
+        if isinstance(input_file, str):
+            with open(input_file, newline="", encoding="utf-8-sig") as f:
+                yield from csv.reader(f)
+        else:
+            f = io.TextIOWrapper(input_file, newline="", encoding="utf-8-sig")
+            try:
+                yield from csv.reader(f)
+            finally:
+                # Leave the caller's file open so it can be read again
+                f.detach()
+
+def read_rows(input_file):
+    """Yields the rows of read_table that have any content, header first."""
+    with closing(read_table(input_file)) as table:
+        for row in table:
+            if any(cell.strip() for cell in row):
+                yield row
+
+def url_from_value(value):
+    """Returns the domain or URL to scrape for a cell value, or "" if it isn't one."""
+    if '@' in value:
+        # It's an email, scrape its domain
+        return value.rpartition('@')[2]
+    return value if _URL_LIKE.fullmatch(value) else ""
+
+def load_urls(input_file):
+    try:
+        # The file is streamed twice: once to pick the URL column, once to read
+        # it. Only up to 20 values per column are ever held in memory.
+        # Blank lines are skipped, so the header is the first line with content.
 
         # --- Intelligent Column Finding --- 
-        url_column = None
-        max_score = -1
-
-        # Analyze columns to find the one with URLs or emails
-        for col in df.columns:
-            score = 0
-            # Sample up to 20 non-empty rows to determine column type
-            samples = df[col].dropna().head(20)
-            if samples.empty:
-                continue
-            
-            for sample in samples:
-                s = str(sample).lower()
-                # Heuristic: score based on content
-                if '@' in s or '.com' in s or any(tld in s for tld in ['.net', '.org', '.io', '.co']):
-                    score += 1
-            
-            if score > max_score:
-                max_score = score
-                url_column = col
-
-        if url_column is None or max_score == 0:
-            print("Could not identify a column containing URLs or emails.", file=sys.stderr)
-            sys.exit(1)
-
-        print(f"[INFO] Identified '{url_column}' as the column containing URLs/emails.", file=sys.stderr)
+        # Score each column by how many of its first 20 non-empty values look like
+        # a URL or email. Read ahead until every column has 20 or the file ends,
+        # so a column that starts out blank is still judged on real values.
+        with closing(read_rows(input_file)) as rows:
+            header = next(rows, [])
+            samples = [[] for _ in header]
+            for row in rows:
+                for col, cell in enumerate(row[:len(header)]):
+                    if cell.strip() and len(samples[col]) < 20:
+                        samples[col].append(cell)
+                if all(len(values) == 20 for values in samples):
+                    break
+        scores = [sum(1 for value in values if _URL_HINT.search(value)) for values in samples]
+
+        if not scores or max(scores) == 0:
+            raise ScrapeError("Could not identify a column containing URLs or emails.")
+        url_index = scores.index(max(scores))
+
+        print(f"[INFO] Identified '{header[url_index]}' as the column containing URLs/emails.", file=sys.stderr)
 
         # --- URL/Domain Extraction ---
-        # Extract values, clean them, and remove duplicates
-        values = df[url_column].dropna().astype(str).str.strip().tolist()
-        
-        urls = []
-        seen = set()
-        for v in values:
-            if not v:
-                continue
-            
-            if '@' in v:
-                # It's an email, extract the domain
-                domain = v.split('@')[-1]
-                if domain and domain not in seen:
-                    urls.append(domain)
-                    seen.add(domain)
-            elif '.' in v and ' ' not in v.strip():
-                # It's likely a URL/domain. Add validation.
-                parts = v.split('.')
-                # A valid domain should have at least two parts (e.g., 'domain.com')
-                # and the part before the first dot must not be empty.
-                if len(parts) >= 2 and parts[0]:
-                    if v not in seen:
-                        urls.append(v)
-                        seen.add(v)
+        # Read just that column from a fresh pass, clean the values, and remove duplicates
+        with closing(read_rows(input_file)) as rows:
+            next(rows, None)
+            values = (row[url_index].strip() for row in rows if url_index < len(row))
+            # dict.fromkeys dedupes while keeping first-seen order
+            urls = list(dict.fromkeys(filter(None, map(url_from_value, values))))
         print(f"[INFO] Extracted {len(urls)} unique domains/URLs to process.", file=sys.stderr)
 
+    except ScrapeError:
+        raise
     except FileNotFoundError:
-        print(f"File not found: {input_file}", file=sys.stderr)
-        sys.exit(1)
+        raise ScrapeError(f"File not found: {input_file}")
     except Exception as e:
-        print(f"Error reading input file. It might be corrupted or in an unsupported format. Details: {e}", file=sys.stderr)
-        sys.exit(1)
+        raise ScrapeError(f"Error reading input file. It might be corrupted or in an unsupported format. Details: {e}")
 
     if not urls:
-        print("No URLs or emails found in the identified column.", file=sys.stderr)
-        sys.exit(1)
+        raise ScrapeError("No URLs or emails found in the identified column.")
+    return urls
+
+def has_contacts(row):
+    return any(row[field] for field in FIELDNAMES if field != "url")
+
+async def scrape(urls, pool=None, cache=None):
+    """Yields one result row per URL, in the order the scrapes finish.
+
+    Uses the given BrowserPool if there is one (the web app keeps one warm),
+    otherwise launches a browser just for this batch. URLs on a domain with a
+    fresh entry in `cache` are answered from it without opening a page.
+    """
+    if pool is None:
+        async with open_pool(size=SCRAPE_CONCURRENCY) as pool:
+            async for row in scrape(urls, pool, cache):
+                yield row
+        return
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        results = []
-        for i, url in enumerate(urls, 1):
-            print(f"[{i}/{len(urls)}] Scraping: {url}")
-            result = await get_contact_info(browser, url)
-            results.append(result)
-        await browser.close()
+    # Queue the batch here rather than in the pool, so one batch cannot
+    # fill the pool's wait queue ahead of other requests. Rows never use an
+    # acquire timeout: once a batch is accepted, every URL waits its turn.
+    batch_slots = asyncio.Semaphore(pool.size)
 
-    with open(output_file, "w", newline="", encoding="utf-8") as f:
-        fieldnames = ["url", "emails", "phones", "facebook", "instagram", "linkedin"]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(results)
+    async def bounded(i, url):
+        async with batch_slots:
+            try:
+                async with pool.context() as context:
+                    print(f"[{i}/{len(urls)}] Scraping: {url}")
+                    return await get_contact_info(context, url)
+            except Exception as e:
+                # A failure in one task must not lose the rest of the batch
+                print(f"[ERROR] {url}: {e!r}", file=sys.stderr)
+                return empty_result(url)
 
-    print(f"\nDone. Scraped {len(results)} websites. Results saved to: {output_file}")
+    # Lead lists often repeat a domain under different paths; each domain is
+    # scraped at most once per batch and the rest share its result
+    by_domain = {}
+
+    async def deduped(i, url):
+        # Domain and cache problems (a malformed cell, a locked cache file) only
+        # cost this URL its cache lookup; it is still scraped, or fails on its own
+        domain = row = None
+        try:
+            domain = canonical_domain(url)
+            if cache is not None:
+                # SQLite blocks, so keep it off the loop the browser pages run on
+                row = await asyncio.to_thread(cache.get, domain)
+        except Exception as e:
+            print(f"[WARN] {url}: Skipping result cache: {e!r}", file=sys.stderr)
+
+        if row is not None:
+            print(f"[{i}/{len(urls)}] Cached: {url}")
+        elif domain in by_domain:
+            row = await by_domain[domain]
+        else:
+            task = asyncio.ensure_future(bounded(i, url))
+            if domain is not None:
+                by_domain[domain] = task
+            row = await task
+            if cache is not None and domain is not None and has_contacts(row):
+                try:
+                    await asyncio.to_thread(cache.put, domain, row)
+                except Exception as e:
+                    print(f"[WARN] {url}: Could not cache result: {e!r}", file=sys.stderr)
+        return {**row, "url": url if url.startswith("http") else "https://" + url}
+
+    tasks = [asyncio.create_task(deduped(i, url)) for i, url in enumerate(urls, 1)]
+    try:
+        for next_row in asyncio.as_completed(tasks):
+            yield await next_row
+    finally:
+        # Only does anything if the consumer stopped early
+        for task in [*tasks, *by_domain.values()]:
+            task.cancel()
+        await asyncio.gather(*tasks, *by_domain.values(), return_exceptions=True)
+
+async def run(input_file: str, output_file: str):
+    urls = load_urls(input_file)
+
+    # Rows are written as they complete, so a crash keeps everything scraped so far
+    scraped = 0
+    cache = ContactCache()
+    try:
+        with open(output_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            async for row in scrape(urls, cache=cache):
+                writer.writerow(row)
+                f.flush()
+                scraped += 1
+    finally:
+        cache.close()
+
+    print(f"\nDone. Scraped {scraped} websites. Results saved to: {output_file}")
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
@@ -202,7 +450,10 @@ if __name__ == "__main__":
     input_path = sys.argv[1]
     output_path = sys.argv[2]
     try:
-        asyncio.run(main(input_path, output_path))
+        asyncio.run(run(input_path, output_path))
+    except ScrapeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         # Final catch-all to ensure any and all errors are reported with details.
         import traceback
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from browser_pool import BrowserPool
+
+
+class _FakeContext:
+    def set_default_timeout(self, timeout):
+        pass
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def close(self):
+        pass
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.created = 0
+
+    def is_connected(self):
+        return True
+
+    async def new_context(self):
+        self.created += 1
+        return _FakeContext()
+
+
+def _pool(size):
+    pool = BrowserPool(playwright=None, size=size)
+    pool.browser = _FakeBrowser()
+    return pool
+
+
+def test_release_refills_warm_contexts():
+    async def main():
+        pool = await _pool(size=2).warm_up(2)
+        async with pool.context():
+            assert len(pool._warm) == 1
+        assert len(pool._warm) == 2
+        assert pool.browser.created == 3
+
+    asyncio.run(main())
+
+
+def test_acquire_timeout_only_when_asked():
+    async def main():
+        pool = _pool(size=1)
+        held = await pool.acquire()
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.acquire(timeout=0.01)
+        waiting = asyncio.ensure_future(pool.acquire())
+        await pool.release(held)
+        assert isinstance(await waiting, _FakeContext)
+
+    asyncio.run(main())
@@ -0,0 +1,189 @@
+import asyncio
+import io
+import re
+import sqlite3
+import threading
+
+import openpyxl
+
+import process
+from contact_cache import ContactCache
+
+
+def test_drop_contained_keeps_longest_numbers():
+    phones = {"15551234567", "5551234567", "1234567", "4401234567"}
+    assert process.drop_contained(phones) == ["15551234567", "4401234567"]
+
+
+def test_drop_contained_skips_long_digit_runs():
+    # Pagination like "1\n2\n...\n399" comes out of inner_text as one huge candidate
+    pagination = process.clean_phone("\n".join(str(n) for n in range(1, 400)))
+    assert process.drop_contained({pagination, "15551234567"}) == ["15551234567"]
+
+
+def test_drop_contained_keeps_number_inside_overlong_run():
+    # The over-long run is discarded, so the real number it contains survives
+    assert process.drop_contained({"5551234567", "55512345679998887776"}) == ["5551234567"]
+
+
+class _StubPool:
+    size = 2
+
+    def context(self):
+        return _StubContext()
+
+
+class _StubContext:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def _collect(urls, cache=None):
+    return [row async for row in process.scrape(urls, _StubPool(), cache)]
+
+
+def test_scrape_survives_malformed_url(monkeypatch):
+    async def fake_contact_info(context, url):
+        return {**process.empty_result(url), "emails": "info@" + url[len("https://"):]}
+
+    monkeypatch.setattr(process, "get_contact_info", fake_contact_info)
+    # "[b.com" makes urlparse raise while computing the cache key
+    rows = asyncio.run(_collect(["a.com", "[b.com", "c.com", "d.com"]))
+    assert sorted(row["url"] for row in rows) == ["https://[b.com", "https://a.com", "https://c.com", "https://d.com"]
+
+
+def test_scrape_survives_cache_errors(monkeypatch):
+    async def fake_contact_info(context, url):
+        return {**process.empty_result(url), "emails": "info@example.com"}
+
+    class BrokenCache:
+        def get(self, domain):
+            raise sqlite3.OperationalError("database is locked")
+
+        def put(self, domain, row):
+            raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(process, "get_contact_info", fake_contact_info)
+    rows = asyncio.run(_collect(["a.com", "b.com"], BrokenCache()))
+    assert [row["emails"] for row in rows] == ["info@example.com", "info@example.com"]
+
+
+
+def test_scrape_keeps_cache_off_the_event_loop(monkeypatch, tmp_path):
+    async def fake_contact_info(context, url):
+        return {"url": url, "emails": "info@example.com", "phones": "", "facebook": "", "instagram": "", "linkedin": ""}
+
+    class ThreadCheckingCache(ContactCache):
+        def get(self, domain):
+            assert threading.get_ident() != loop_thread
+            return super().get(domain)
+
+        def put(self, domain, row):
+            assert threading.get_ident() != loop_thread
+            super().put(domain, row)
+
+    async def main():
+        nonlocal loop_thread
+        loop_thread = threading.get_ident()
+        return await _collect(["a.com", "www.a.com"], cache)
+
+    loop_thread = None
+    cache = ThreadCheckingCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(process, "get_contact_info", fake_contact_info)
+    try:
+        rows = asyncio.run(main())
+        assert [row["emails"] for row in rows] == ["info@example.com", "info@example.com"]
+        assert ContactCache.get(cache, "a.com")["emails"] == "info@example.com"
+    finally:
+        cache.close()
+
+def test_load_urls_finds_column_that_starts_blank():
+    lines = ["name,website"] + [f"Lead {n}," for n in range(25)] + ["Acme,acme.com"]
+    upload = io.BytesIO("\n".join(lines).encode())
+    assert process.load_urls(upload) == ["acme.com"]
+
+
+def test_load_urls_skips_blank_lines_before_header():
+    upload = io.BytesIO(b"\n\nname,email\nA,sales@acme.com\n\nB,foo.io\n")
+    assert process.load_urls(upload) == ["acme.com", "foo.io"]
+
+
+def test_pick_contact_url_stays_on_site():
+    hrefs = [
+        "mailto:contact@acme.com",
+        "https://www.linkedin.com/company/acme/about",
+        "https://support.google.com/",
+        "/contact-us",
+    ]
+    assert process.pick_contact_url("https://www.acme.com/", hrefs) == "https://www.acme.com/contact-us"
+
+
+def test_pick_contact_url_none_when_only_off_site():
+    assert process.pick_contact_url("https://acme.com/", ["https://[bad/about", "tel:support"]) is None
+
+
+def test_clean_phone_drops_unicode_whitespace():
+    # French formatting uses U+202F narrow no-break spaces between digit groups
+    assert process.clean_phone("+33\u202f1\u202f23\u202f45\u202f67\u202f89") == "33123456789"
+    assert process.clean_phone("+1 (555) 123-4567") == "15551234567"
+
+
+def test_mailto_addresses_decodes_links():
+    links = [
+        "MAILTO:Sales@acme.com",
+        "mailto:info%40acme.com?subject=Hi",
+        "mailto:help&#64;acme.com",
+        "https://www.facebook.com/acme",
+    ]
+    found = process.email_pattern.findall(" ".join(process.mailto_addresses(links)))
+    assert found == ["Sales@acme.com", "info@acme.com", "help@acme.com"]
+
+
+def test_load_urls_rereads_in_memory_xlsx(tmp_path):
+    workbook = openpyxl.Workbook()
+    workbook.active.append(["name", "notes", "email"])
+    for n in range(30):
+        workbook.active.append([f"Lead {n}", None, f"info@site{n}.com"])
+    upload = io.BytesIO()
+    workbook.save(upload)
+    workbook.save(tmp_path / "leads.xlsx")
+
+    expected = [f"site{n}.com" for n in range(30)]
+    assert process.load_urls(upload) == expected
+    assert process.load_urls(str(tmp_path / "leads.xlsx")) == expected
+
+
+def test_load_urls_with_blank_column_reads_path_twice(tmp_path):
+    path = tmp_path / "leads.csv"
+    path.write_text("site,notes\n" + "".join(f"lead{n}.com,\n" for n in range(100)))
+    assert len(process.load_urls(str(path))) == 100
+
+
+class _SomLeftmostDatabase:
+    """Reports matches the way a SOM_LEFTMOST Hyperscan database does: every end offset, each with its leftmost start."""
+
+    def __init__(self, patterns):
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+
+    def scan(self, data, match_event_handler):
+        text = data.decode("utf-8")
+        for pattern_id, pattern in enumerate(self.patterns):
+            for end in range(len(text) + 1):
+                for start in range(end):
+                    if pattern.fullmatch(text, start, end):
+                        match_event_handler(pattern_id, start, end, 0, None)
+                        break
+
+
+def test_find_contacts_matches_findall_with_database(monkeypatch):
+    monkeypatch.setattr(
+        process, "contact_db", _SomLeftmostDatabase([process.EMAIL_REGEX, process.PHONE_REGEX])
+    )
+    for text in ["info@a.com-sales@b.com", "a@b.cc.x@d.ee", "call 555-123-4567 or mail a@b.io", "nothing here"]:
+        assert process.find_contacts(text) == (
+            set(process.email_pattern.findall(text)),
+            set(process.phone_pattern.findall(text)),
+        )
@@ -2,50 +2,64 @@ import csv
 import re
 import asyncio
 import sys
-from playwright.async_api import async_playwright
+try:
+    # Linear-time matching for the patterns that scan whole pages
+    import re2
+except ImportError:
+    import re as re2
+from browser_pool import open_pool
 
 # === Patterns ===
-email_pattern = re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
-phone_pattern = re.compile(r"(\+?\d[\d\s().-]{7,}\d)")
-social_patterns = {
-    "facebook": re.compile(r"facebook\.com/[^\s\"'<>]+"),
-    "instagram": re.compile(r"instagram\.com/[^\s\"'<>]+"),
-    "linkedin": re.compile(r"linkedin\.com/[^\s\"'<>]+"),
-}
+email_pattern = re2.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
+phone_pattern = re2.compile(r"(\+?\d[\d\s().-]{7,}\d)")
+# One alternation per platform; `lastgroup` on a match names the platform
+_SOCIAL = re2.compile(
+    r"(?P<facebook>facebook\.com/[^\s\"'<>]+)"
+    r"|(?P<instagram>instagram\.com/[^\s\"'<>]+)"
+    r"|(?P<linkedin>linkedin\.com/[^\s\"'<>]+)"
+)
+# YYYY, YYYY-MM or YYYY-MM-DD (either separator)
+_DATE_ANY = re.compile(r"\d{4}(?:[-/]\d{2}(?:[-/]\d{2})?)?")
+_WS = re.compile(r"\s+")
+_YYYY_YYYY = re.compile(r"^\d{4}\s*[-–]\s*\d{4}$")
+_SPACED_DIGITS = re.compile(r"(\d\s+){3,}\d")
+_SCRIPT_STYLE = re.compile(r"<(script|style)\b[^>]*>.*?</\1>", re.DOTALL | re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+# Deletes every non-digit in one str.translate pass
+_DIGIT_TABLE = str.maketrans("", "", "".join(chr(c) for c in range(256) if not chr(c).isdigit()))
 
 def is_date(string):
     string_clean = string.replace(" ", "")
-    if re.fullmatch(r"\d{4}[-/]\d{2}[-/]\d{2}", string_clean):
-        return True
-    if re.fullmatch(r"\d{4}[-/]\d{2}", string_clean) or re.fullmatch(r"\d{4}", string_clean):
-        return True
-    return False
+    return _DATE_ANY.fullmatch(string_clean) is not None
 
 def filter_phones(phones):
     unique_phones = set()
     for phone in phones:
-        cleaned = re.sub(r"\s+", " ", phone).strip()
-        if is_date(cleaned):
+        cleaned = _WS.sub(" ", phone).strip()
+        # Cheapest check first; most candidates are rejected for being too short
+        digit_count = len(cleaned.translate(_DIGIT_TABLE))
+        if digit_count < 8:
             continue
-        if re.match(r"^\d{4}\s*[-–]\s*\d{4}$", cleaned):
+        # Dates and year ranges never have more than 8 digits
+        if digit_count == 8 and (is_date(cleaned) or _YYYY_YYYY.match(cleaned)):
             continue
-        if re.match(r"(\d\s+){3,}\d", cleaned):
-            continue
-        digits_only = re.sub(r"\D", "", cleaned)
-        if len(digits_only) < 8:
+        if _SPACED_DIGITS.match(cleaned):
             continue
         unique_phones.add(cleaned)
     return list(unique_phones)
 
-async def extract_contact_info(playwright, url):
-    browser = await playwright.chromium.launch(headless=True)
-    page = await browser.new_page()
+async def extract_contact_info(context, url):
+    page = await context.new_page()
     try:
-        await page.goto(url, timeout=20000)
+        await page.goto(url, timeout=20000, wait_until="domcontentloaded")
+        try:
+            await page.wait_for_selector("a[href]", state="attached", timeout=2000)
+        except Exception:
+            pass
         html_content = await page.content()
 
-        html_content = re.sub(r"<(script|style).?>.?</\1>", "", html_content, flags=re.DOTALL | re.IGNORECASE)
-        text = re.sub(r"<[^>]+>", " ", html_content)
+        html_content = _SCRIPT_STYLE.sub("", html_content)
+        text = _TAG.sub(" ", html_content)
 
         emails = list(set(email_pattern.findall(text)))
         raw_phones = [match.group().strip() for match in phone_pattern.finditer(text)]
@@ -53,13 +67,16 @@ async def extract_contact_info(playwright, url):
 
         links = await page.eval_on_selector_all("a[href]", "elements => elements.map(el => el.href)")
         socials = {"facebook": "", "instagram": "", "linkedin": ""}
+        # Stop at the first link for every platform; pages can have hundreds
+        missing = len(socials)
         for link in links:
-            for platform, pattern in social_patterns.items():
-                if pattern.search(link):
-                    socials[platform] = link
+            m = _SOCIAL.search(link)
+            if m and not socials[m.lastgroup]:
+                socials[m.lastgroup] = link
+                missing -= 1
+                if not missing:
                     break
 
-        await browser.close()
         return {
             "email": ", ".join(emails),
             "phone": ", ".join(phones),
@@ -69,7 +86,6 @@ async def extract_contact_info(playwright, url):
         }
     except Exception as e:
         print(f"[ERROR] {url}: {e}")
-        await browser.close()
         return {
             "email": "",
             "phone": "",
@@ -77,28 +93,42 @@ async def extract_contact_info(playwright, url):
             "instagram": "",
             "linkedin": ""
         }
+    finally:
+        await page.close()
 
-async def main():
-    if len(sys.argv) != 3:
-        print("Usage: python web.py <url> <output_csv>")
-        return
+HEADER = ["Website", "Email", "Phone", "Facebook", "Instagram", "LinkedIn"]
 
-    url = sys.argv[1]
-    output_csv = sys.argv[2]
+async def scrape(url, pool, acquire_timeout=None):
+    """Scrapes a single site and returns its CSV row, matching HEADER.
 
+    Raises asyncio.TimeoutError if the pool has no free context within
+    `acquire_timeout` seconds.
+    """
     if not url.startswith("http"):
         url = "https://" + url
 
-    async with async_playwright() as playwright:
-        print(f"[INFO] Scraping: {url}")
-        data = await extract_contact_info(playwright, url)
+    print(f"[INFO] Scraping: {url}")
+    async with pool.context(acquire_timeout) as context:
+        data = await extract_contact_info(context, url)
+    return [url, data["email"], data["phone"], data["facebook"], data["instagram"], data["linkedin"]]
+
+async def run(url, output_csv, pool=None):
+    if pool is None:
+        async with open_pool(size=1) as pool:
+            return await run(url, output_csv, pool)
 
-        with open(output_csv, "w", newline='', encoding="utf-8") as outfile:
-            writer = csv.writer(outfile)
-            writer.writerow(["Website", "Email", "Phone", "Facebook", "Instagram", "LinkedIn"])
-            writer.writerow([url, data["email"], data["phone"], data["facebook"], data["instagram"], data["linkedin"]])
+    row = await scrape(url, pool)
+
+    with open(output_csv, "w", newline='', encoding="utf-8") as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(HEADER)
+        writer.writerow(row)
 
     print("✅ Done. Results saved to:", output_csv)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if len(sys.argv) != 3:
+        print("Usage: python web.py <url> <output_csv>")
+        sys.exit(1)
+
+    asyncio.run(run(sys.argv[1], sys.argv[2]))